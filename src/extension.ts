@@ -236,7 +236,8 @@ export async function activate(context: vscode.ExtensionContext) {
     const diagnostics: vscode.Diagnostic[] = [];
     for (let i = 0; i < doc.lineCount; i++) {
       const text = doc.lineAt(i).text;
-      if (!/\b(Given|When|Then|And|But)\b/.test(text)) continue;
+      // same step-line test as the CLI's --undefined scan, so both passes agree
+      if (!/^\s*(Given|When|Then|And|But)\b/i.test(text)) continue;
       const normalized = normalizeGherkinTS(text);
       // if found in index, skip
       const matched = stepIndex.find(s => s.normalized === normalized);
@@ -13,61 +13,112 @@ Assumes workspace root = current working directory with:
   features/steps/**/*.py
 """
 
-import sys, json, argparse, re
+import sys, json, argparse, re, os, hashlib, functools, tempfile, bisect, mmap
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+FEATURES_DIR = Path("features")
+STEPS_DIR = FEATURES_DIR / "steps"
+CACHE_FILE = Path(".cache") / "find_step_index.json"
+# bump whenever the shape of cached entries or the normalization changes
+CACHE_VERSION = 5
+
+def _walk(root: str, suffix: str):
+    """
+    Yield the paths (as plain strings) of files under root whose name
+    ends with suffix. Uses os.scandir directly instead of Path.rglob to
+    avoid building a Path object for every directory entry.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    # directory symlinks are not followed (avoids loops),
+                    # but symlinked files are yielded like rglob does
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(suffix) and entry.is_file():
+                        yield entry.path
+                except OSError:
+                    continue
+
 def find_feature_files(root: Path):
-    return list(root.rglob("*.feature"))
+    return list(_walk(str(root / FEATURES_DIR), ".feature"))
 
-STEP_DECORATOR_RE = re.compile(
-    r'^\s*@(?P<kw>given|when|then|step|and)\s*\(',
+# step and feature files are scanned as bytes; only matched fragments
+# are decoded
+STEP_LINE_RE = re.compile(
+    rb'^[ \t]*@(?P<kw>given|when|then|step|and)\((?P<pat>.+)\)',
+    re.I | re.M
+)
+GHERKIN_STEP_RE = re.compile(
+    rb'^[ \t]*(?:Given|When|Then|And|But)\b[^\n]*',
     re.I | re.M
 )
 
-def is_step_file(py_file: Path) -> bool:
-    try:
-        text = py_file.read_text(encoding="utf-8")
-    except Exception:
-        return False
-    return bool(STEP_DECORATOR_RE.search(text))
-
-def find_step_files(root: Path):
-    step_files = []
-    for py in root.rglob("*.py"):
-        if is_step_file(py):
-            step_files.append(py)
-    return step_files
+# normalization patterns
+LEADING_KEYWORDS = frozenset(("feature", "scenario", "given", "when", "then", "and", "but"))
+STRING_PREFIX_RE = re.compile(r'^[ruRU]\s*')
+# double-quoted strings get their own pass first, as in normalizeGherkinTS:
+# an apostrophe before a quoted value (the user's name is "O'Brien") must
+# not open a single-quoted span that swallows the opening "
+DQUOTED_RE = re.compile(r'"[^"]*"')
+# one alternation for every other token that normalization rewrites, so
+# the rest of the line is scanned once: '...' | {param} | (\d+) / (\d+\.\d+) | number
+TOKEN_RE = re.compile(
+    r"('[^']*')"
+    r'|(\{[^}]+\}'
+    r'|\(\\?d\+(?:\\\.\\?d\+)?\)'
+    r'|\b\d+(?:\.\d+)?\b)'
+)
+# placeholder per TOKEN_RE group, indexed by match.lastindex
+TOKEN_PLACEHOLDERS = (None, "'{}'", '{}')
 
+def _strip_keyword(s: str) -> str:
+    """Drop a leading Gherkin keyword (any case) and the whitespace after it."""
+    parts = s.split(None, 1)
+    if len(parts) == 2 and parts[0].lower() in LEADING_KEYWORDS:
+        return parts[1]
+    return s
 
+def _token_repl(m) -> str:
+    return TOKEN_PLACEHOLDERS[m.lastindex]
 
+# feature files repeat the same steps over and over (backgrounds,
+# outlines, shared setup), so normalized lines are memoized
+@functools.lru_cache(maxsize=8192)
 def normalize_gherkin(s: str) -> str:
     """
     Normalize a Gherkin line from a .feature file by:
       - removing leading keyword (Feature/Scenario/Given/When/Then/And/But)
       - replacing quoted strings with "{}"
-      - replacing numeric tokens (integers/floats) with "{}"
+      - replacing numeric tokens (integers/floats) and {params} with "{}"
       - collapsing extra whitespace
     This makes it comparable to normalized patterns extracted from step defs.
     """
     s = s.strip()
-    s = re.sub(r'^(Feature|Scenario|Given|When|Then|And)\s+', '', s, flags=re.I)
-    # replace quoted strings with placeholder
-    s = re.sub(r'"[^"]*"', '"{}"', s)
-    s = re.sub(r"'[^']*'", "'{}'", s)
-    # replace numbers (integers and floats) with placeholder
-    s = re.sub(r'\b\d+(\.\d+)?\b', '{}', s)
-    # def repl_token(m):
-    #     token = m.group(0)
-    #     if token == "{}":
-    #         return token
-    #     if "_" in token or re.search(r'\d', token):
-    #         return "{}"
-    #     return token
-
-    # s = re.sub(r'\b[A-Za-z_][A-Za-z0-9_]*\b', repl_token, s)
+    s = _strip_keyword(s)
+    # replace quoted strings, {params} and numbers with placeholders
+    s = DQUOTED_RE.sub('"{}"', s)
+    s = TOKEN_RE.sub(_token_repl, s)
     # collapse whitespace
-    s = re.sub(r'\s+', ' ', s)
-    return s.strip()
+    return ' '.join(s.split())
 
 def normalize_pattern(pat: str) -> str:
     """
@@ -75,88 +126,244 @@ def normalize_pattern(pat: str) -> str:
       - remove r/R/u prefixes and surrounding quotes
       - replace {param} placeholders with {}
       - replace any quoted string inside pattern with {}
-      - replace numeric regex groups with {}
+      - replace numeric regex groups and number literals with {}
     """
     pat = pat.strip()
     # strip leading r' or u' etc.
-    pat = re.sub(r'^[ruRU]\s*', '', pat)
+    pat = STRING_PREFIX_RE.sub('', pat, count=1)
     # remove surrounding quotes if present
     if (pat.startswith('"') and pat.endswith('"')) or (pat.startswith("'") and pat.endswith("'")):
         pat = pat[1:-1]
-    # replace {param} with {}
-    pat = re.sub(r'\{[^}]+\}', '{}', pat)
-    # replace explicit regex numeric groups like (\d+), (\d+\.\d+), etc. with {}
-    pat = re.sub(r'\(\\?d\+\)', '{}', pat)           # (\d+)
-    pat = re.sub(r'\(\\?d\+\.\d\+\)', '{}', pat)     # (\d+\.\d+)
-    # replace quoted pieces with {}
-    pat = re.sub(r'"[^"]*"', '"{}"', pat)
-    pat = re.sub(r"\'[^\']*\'", "'{}'", pat)
+    # replace {param}, numeric regex groups and quoted pieces with placeholders
+    pat = DQUOTED_RE.sub('"{}"', pat)
+    pat = TOKEN_RE.sub(_token_repl, pat)
     # collapse whitespace
-    pat = re.sub(r'\s+', ' ', pat)
-    return pat.strip()
+    return ' '.join(pat.split())
+
+def _newline_offsets(text):
+    """
+    Offsets of every newline in text (bytes or mmap), for bisect-based
+    line lookup.
+    """
+    offsets = []
+    i = text.find(b"\n")
+    while i != -1:
+        offsets.append(i)
+        i = text.find(b"\n", i + 1)
+    return offsets
+
+def _entry(path: str, row) -> dict:
+    """Materialize a (line, raw, normalized, keyword) row as an index entry."""
+    line, raw, norm, kw = row
+    return {
+        "file": path,
+        "line": line,
+        "raw": raw,
+        "normalized": norm,
+        "keyword": kw
+    }
+
+def _parse_one_step_file(path: str):
+    """
+    Extract the step definitions declared in a single file as compact
+    (line, raw, normalized, keyword) rows; see _entry(). The file is
+    read once; a file without step decorators just yields no rows.
+    """
+    try:
+        with open(path, "rb") as fh:
+            text = fh.read()
+    except Exception:
+        return []
 
-def build_index():
-    root = Path.cwd()
     res = []
+    offsets = None
+    for m in STEP_LINE_RE.finditer(text):
+        if offsets is None:
+            offsets = _newline_offsets(text)
+        raw = m.group("pat").strip().decode("utf-8", "replace")
+        norm = normalize_pattern(raw)
+        res.append((
+            bisect.bisect_right(offsets, m.start()) + 1,
+            raw,
+            norm,
+            m.group("kw").decode("ascii").lower()
+        ))
+    return res
 
-    for py in find_step_files(root):
+def step_fingerprint(root: Path):
+    """
+    Return a hashable snapshot of the step files: one
+    (path, st_mtime_ns, st_size) tuple per *.py under features/steps.
+    """
+    fp = []
+    for path in _walk(str(root / STEPS_DIR), ".py"):
         try:
-            text = py.read_text(encoding="utf-8")
-        except Exception:
+            st = os.stat(path)
+        except OSError:
             continue
+        fp.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(fp))
 
-        for i, line in enumerate(text.splitlines(), start=1):
-            m = re.match(
-                r'^\s*@(?P<kw>given|when|then|step|and)\((?P<pat>.+)\)',
-                line,
-                flags=re.I
-            )
-            if m:
-                raw = m.group("pat").strip()
-                norm = normalize_pattern(raw)
-                res.append({
-                    "file": str(py),
-                    "line": i,
-                    "raw": raw,
-                    "normalized": norm,
-                    "keyword": m.group("kw").lower()
-                })
+def _load_cache(root: Path) -> dict:
+    try:
+        cache = json.loads(root.joinpath(CACHE_FILE).read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    # the cache is disposable: anything not shaped as we wrote it is
+    # treated as empty and rebuilt rather than crashing the CLI
+    files = cache.get("files")
+    if not isinstance(files, dict) or not all(_valid_cached_file(c) for c in files.values()):
+        return {}
+    return cache
 
-    return res
+def _valid_cached_file(c) -> bool:
+    return (
+        isinstance(c, dict)
+        and isinstance(c.get("mtime_ns"), int)
+        and isinstance(c.get("size"), int)
+        and isinstance(c.get("entries"), list)
+        and all(_valid_cached_row(row) for row in c["entries"])
+    )
+
+def _valid_cached_row(row) -> bool:
+    # (line, raw, normalized, keyword), see _entry()
+    return (
+        isinstance(row, list)
+        and len(row) == 4
+        and isinstance(row[0], int)
+        and all(isinstance(v, str) for v in row[1:])
+    )
+
+def _save_cache(root: Path, data: dict):
+    """
+    Write the cache atomically (temp file + rename) so a concurrent
+    invocation never reads a half-written file.
+    """
+    cache_file = root.joinpath(CACHE_FILE)
+    tmp = None
+    try:
+        try:
+            cache_file.parent.mkdir(parents=True)
+        except FileExistsError:
+            pass
+        else:
+            # keep the cache out of the user's git status, as pytest does
+            cache_file.parent.joinpath(".gitignore").write_text("*\n", encoding="utf-8")
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_dumps(data))
+        os.replace(tmp, cache_file)
+        tmp = None
+    except (OSError, TypeError, ValueError):
+        # the cache is optional: a read-only workspace or a path that
+        # cannot be encoded (e.g. a non-UTF-8 file name) just means no
+        # persistent cache
+        pass
+    finally:
+        # never leave a temp file behind, whatever failed before the rename
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+@functools.lru_cache(maxsize=None)
+def _index_for(root: Path, fingerprint: tuple):
+    """
+    Return (path, rows) for every file in the fingerprint. Step files
+    whose (mtime, size) match the on-disk cache are not re-parsed.
+    """
+    key = hashlib.sha1(repr(fingerprint).encode("utf-8")).hexdigest()
+    cache = _load_cache(root)
+    cached_files = cache.get("files", {})
+
+    if cache.get("key") == key and all(path in cached_files for path, _, _ in fingerprint):
+        # nothing changed since the cache was written: no parsing at all
+        files = cached_files
+    else:
+        stale = []
+        for path, mtime_ns, size in fingerprint:
+            c = cached_files.get(path)
+            if not (c and c["mtime_ns"] == mtime_ns and c["size"] == size):
+                stale.append(path)
+        parsed = {path: _parse_one_step_file(path) for path in stale}
+
+        files = {}
+        for path, mtime_ns, size in fingerprint:
+            entries = parsed[path] if path in parsed else cached_files[path]["entries"]
+            files[path] = {"mtime_ns": mtime_ns, "size": size, "entries": entries}
+        _save_cache(root, {"version": CACHE_VERSION, "key": key, "files": files})
+
+    return tuple((path, files[path]["entries"]) for path, _, _ in fingerprint)
+
+# Matching is exact on the normalized form, so a hashed set/dict is the
+# right structure: one O(len(line)) hash per Gherkin line. If fuzzy or
+# substring matching is ever added, the upgrade path is to compile the
+# normalized patterns once into an Aho-Corasick automaton (e.g.
+# pyahocorasick: add_word(norm, (path, row)) + make_automaton()) and
+# run every feature line through it in a single pass.
+@functools.lru_cache(maxsize=None)
+def _norm_set_for(root: Path, fingerprint: tuple):
+    return frozenset(row[2] for _, rows in _index_for(root, fingerprint) for row in rows)
+
+def _norm_set():
+    root = Path.cwd()
+    return _norm_set_for(root, step_fingerprint(root))
+
+def build_index():
+    root = Path.cwd()
+    return [
+        _entry(path, row)
+        for path, rows in _index_for(root, step_fingerprint(root))
+        for row in rows
+    ]
 
 
 def find_match(gherkin_line: str):
     targ = normalize_gherkin(gherkin_line)
-    print("Searching for normalized line:", targ)
-    idx = build_index()
-    for e in idx:
-        if e["normalized"] == targ:
-            return e
+    # a CLI run answers exactly one query, so compare the compact rows
+    # directly and stop at the first hit instead of building a lookup
+    # dict over every definition; only the hit becomes an entry dict
+    root = Path.cwd()
+    for path, rows in _index_for(root, step_fingerprint(root)):
+        for row in rows:
+            if row[2] == targ:
+                return _entry(path, row)
     return None
 
-def list_undefined():
-    root = Path.cwd()
-    idx = build_index()
-    normalized_set = {e["normalized"] for e in idx}
+def _scan_feature_file(path: str, normalized_set):
+    """Return the steps of one feature file that have no step definition."""
     missing = []
-
-    for f in find_feature_files(root):
-        try:
-            txt = f.read_text(encoding="utf-8")
-        except Exception:
-            continue
-
-        for i, line in enumerate(txt.splitlines(), start=1):
-            if re.search(r'\b(Given|When|Then|And|But)\b', line):
+    try:
+        with open(path, "rb") as fh, \
+                mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # scan the mapped page cache for step lines in one pass
+            offsets = None
+            for m in GHERKIN_STEP_RE.finditer(mm):
+                line = m.group(0).decode("utf-8", "replace")
                 norm = normalize_gherkin(line)
                 if norm and norm not in normalized_set:
+                    if offsets is None:
+                        offsets = _newline_offsets(mm)
                     missing.append({
-                        "feature_file": str(f),
-                        "line": i,
+                        "feature_file": path,
+                        "line": bisect.bisect_right(offsets, m.start()) + 1,
                         "text": line.strip(),
                         "normalized": norm
                     })
+    except (OSError, ValueError):
+        # unreadable, or empty (an empty file cannot be mapped)
+        return missing
+    return missing
 
+def list_undefined():
+    root = Path.cwd()
+    normalized_set = _norm_set()
+    missing = []
+    for path in find_feature_files(root):
+        missing.extend(_scan_feature_file(path, normalized_set))
     return missing
 
 def main():
@@ -166,15 +373,16 @@ def main():
     parser.add_argument("--undefined", action="store_true")
     args = parser.parse_args()
     if args.index:
-        print(json.dumps(build_index(), ensure_ascii=False))
-        return
-    if args.line:
-        print(json.dumps(find_match(args.line), ensure_ascii=False))
-        return
-    if args.undefined:
-        print(json.dumps(list_undefined(), ensure_ascii=False))
+        result = build_index()
+    elif args.line:
+        result = find_match(args.line)
+    elif args.undefined:
+        result = list_undefined()
+    else:
+        parser.print_help()
         return
-    parser.print_help()
+    sys.stdout.buffer.write(_dumps(result) + b"\n")
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file